@@ -13,11 +13,11 @@ Quick features:
 - Interactive file selection or CLI args
 - Multi-page selection (e.g. "1,3,5-7" or "all")
 - Uses pdfplumber for text PDFs, falls back to pytesseract OCR for scanned PDFs
-- DBSCAN clustering to infer columns (tune `x_eps` and `y_tol`)
+- Gap-based column inference on token x positions (tune `x_gap` and `y_tol`)
 - Saves CSV per page and a combined CSV per file
 
 Practical tips (also included in README):
-- Tune tolerances: `y_tol` and `x_eps` depend on PDF resolution and font sizes; test visually.
+- Tune tolerances: `y_tol` and `x_gap` depend on PDF resolution and font sizes; test visually.
 - Header detection: detect a header row (e.g., bigger font) to set column names.
 - Post-processing: regex-based normalization for numeric fields, units, and merging broken cells.
 - Use layout models: if heuristics fail, use specialized table-detection models (CascadeTabNet, TableNet, TableFormer) to detect cell polygons, then OCR each cell.
@@ -33,33 +33,54 @@ import os
 import argparse
 import sys
 import shutil
+import tempfile
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
 
-import numpy as np
-import pandas as pd
-
-# PDF / OCR libs
-try:
-    import pdfplumber
-except Exception:
-    pdfplumber = None
-try:
-    from pdf2image import convert_from_path
-except Exception:
-    convert_from_path = None
-try:
-    from PIL import Image
-except Exception:
-    Image = None
-try:
-    import pytesseract
-    from pytesseract import Output
-except Exception:
-    pytesseract = None
-    Output = None
-
-from sklearn.cluster import DBSCAN
+# Heavy libraries are imported on first use, so `--help` and process-pool workers start fast.
+# numpy/pandas are imported inside the functions that need them; the optional
+# PDF / OCR libs go through the cached getters below (None if not installed).
+
+@lru_cache(maxsize=None)
+def _pdfplumber():
+    try:
+        import pdfplumber
+    except Exception:
+        return None
+    return pdfplumber
+
+
+@lru_cache(maxsize=None)
+def _convert_from_path():
+    try:
+        from pdf2image import convert_from_path
+    except Exception:
+        return None
+    return convert_from_path
+
+
+@lru_cache(maxsize=None)
+def _pil_image():
+    try:
+        from PIL import Image
+    except Exception:
+        return None
+    return Image
+
+
+@lru_cache(maxsize=None)
+def _pytesseract():
+    try:
+        import pytesseract
+    except Exception:
+        return None
+    return pytesseract
+
+
+# Extraction options shared by the CLI defaults and the web UI
+DEFAULT_OPTIONS = {"dpi": 200, "preview_dpi": 72, "poppler_path": None, "y_tol": 6.0, "x_gap": 50.0, "min_conf": 30.0, "combined_only": False}
 
 
 # -------- Utilities --------
@@ -68,6 +89,33 @@ def ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
 
 
+def write_csv(df, path: Path):
+    """Write a DataFrame to CSV without the index, byte-for-byte as `DataFrame.to_csv` would.
+
+    Uses pyarrow's (much faster) writer when it is installed and the frame is plain text; pyarrow
+    writes unquoted, so any value needing quotes makes it fall back to pandas' minimal quoting.
+    """
+    import pandas as pd
+
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        pa = None
+    # only text columns (non-text values would be formatted differently); a single column is left
+    # to pandas because the csv module quotes rows consisting of one empty field
+    text_only = len(df.columns) > 1 and all(t == object or pd.api.types.is_string_dtype(t) for t in df.dtypes)
+    if pa is not None and text_only:
+        try:
+            options = pa_csv.WriteOptions(quoting_style="none", quoting_header="none", eol=os.linesep)
+            pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), str(path), options)
+            return
+        except (pa.ArrowException, TypeError, ValueError):
+            # values with delimiters/quotes/newlines, non-text objects, or a pyarrow without quoting_header
+            pass
+    df.to_csv(str(path), index=False)
+
+
 def parse_pages_spec(spec: str, n_pages: int):
     """Parse page specification like "1,3,5-7" or "all" into 0-based indices."""
     spec = spec.strip().lower()
@@ -90,193 +138,327 @@ def parse_pages_spec(spec: str, n_pages: int):
 
 # -------- Extraction logic (text PDF) --------
 
-def extract_table_from_words(words, y_tol=5, x_gap=50):
-    """Take a list of words (dicts with x0,x1,top,bottom,text) and return a DataFrame."""
+def table_frame(n_rows, n_cols, page_image=None):
+    """Preallocate an empty-string cell grid (Fortran order); returns (cells, first data column, column labels).
+
+    When `page_image` is given it fills a leading `page_image` column, so the
+    DataFrame is built with it in place instead of inserting it afterwards.
+    """
+    import numpy as np
+
+    lead = 0 if page_image is None else 1
+    cells = np.empty((n_rows, n_cols + lead), dtype=object, order="F")
+    cells.fill("")
+    columns = list(range(n_cols))
+    if page_image is not None:
+        cells[:, 0] = page_image
+        columns.insert(0, "page_image")
+    return cells, lead, columns
+
+
+def table_from_rows(table, page_image=None):
+    """Turn a list of row lists (e.g. from pdfplumber `extract_tables`) into a DataFrame."""
+    import pandas as pd
+
+    if not table:
+        return pd.DataFrame()
+    n_cols = max(len(row) for row in table)
+    cells, lead, columns = table_frame(len(table), n_cols, page_image)
+    for ri, row in enumerate(table):
+        cells[ri, lead:lead + len(row)] = row
+    return pd.DataFrame(cells, columns=columns, copy=False)
+
+
+def extract_table_from_words(words, y_tol=5, x_gap=50, page_image=None):
+    """Take a list of words (dicts with x0,x1,top,bottom,text) and return a DataFrame.
+
+    If `page_image` is given, it is added as the first column (`page_image`).
+    """
+    import numpy as np
+    import pandas as pd
+
     if not words:
         return pd.DataFrame()
-    # sort
-    words = sorted(words, key=lambda w: (w["top"], w["x0"]))
-    # group into rows by y tolerance
-    rows = []
-    cur_row = []
-    cur_top = None
-    for w in words:
-        top = w["top"]
-        if cur_top is None or abs(top - cur_top) <= y_tol:
-            cur_row.append(w)
-            cur_top = top if cur_top is None else (cur_top + top) / 2.0
+    # sort by (top, x0)
+    tops = np.array([w["top"] for w in words], dtype=float)
+    x0s = np.array([w["x0"] for w in words], dtype=float)
+    order = np.lexsort((x0s, tops))
+    # group into rows by y tolerance: a word joins the current row if its top is within y_tol
+    # of the row's running average top, otherwise it starts a new row
+    sorted_tops = tops[order].tolist()
+    breaks = []
+    cur_top = sorted_tops[0]
+    for i in range(1, len(sorted_tops)):
+        top = sorted_tops[i]
+        if abs(top - cur_top) <= y_tol:
+            cur_top = (cur_top + top) / 2.0
         else:
-            rows.append(cur_row)
-            cur_row = [w]
+            breaks.append(i)
             cur_top = top
-    if cur_row:
-        rows.append(cur_row)
-
-    # Detect columns by finding gaps in x positions
-    all_x0 = sorted(set(w["x0"] for r in rows for w in r))
-    boundaries = [0]
-    for i in range(1, len(all_x0)):
-        if all_x0[i] - all_x0[i-1] > x_gap:
-            boundaries.append(all_x0[i])
-    boundaries.append(float('inf'))
+    rows = [[words[i] for i in chunk] for chunk in np.split(order, breaks)]
+
+    # Detect columns by finding gaps in x positions: a column starts at each
+    # distinct x0 that is more than x_gap right of the previous distinct x0
+    all_x0 = np.unique(x0s)
+    gap_idx = np.flatnonzero(np.diff(all_x0) > x_gap) + 1
+    boundaries = np.concatenate(([0.0], all_x0[gap_idx], [np.inf]))
     n_cols = len(boundaries) - 1
 
-    # For each row, assign words to columns
-    table_rows = []
-    for r in rows:
-        row_cells = [""] * n_cols
-        for w in r:
-            x0 = w["x0"]
-            for i in range(n_cols):
-                if boundaries[i] <= x0 < boundaries[i+1]:
-                    text = w.get("text", "").strip()
-                    existing = row_cells[i]
-                    row_cells[i] = (existing + " " + text).strip() if existing else text
-                    break
-        table_rows.append(row_cells)
-
-    max_cols = max(len(r) for r in table_rows) if table_rows else 0
-    normalized = [row + [""] * (max_cols - len(row)) for row in table_rows]
-    df = pd.DataFrame(normalized)
+    # For each row, assign words to columns. Cells go straight into a preallocated
+    # Fortran-order array, which matches pandas' column-major block layout.
+    cells, lead, columns = table_frame(len(rows), n_cols, page_image)
+    # column index of every word (same (top, x0) order as rows); -1 means left of the first boundary
+    col_idx = np.searchsorted(boundaries[:-1], x0s[order], side="right") - 1
+    for ri, (r, cols) in enumerate(zip(rows, np.split(col_idx, breaks))):
+        # collect tokens per cell and join once per row
+        row_cells = [[] for _ in range(n_cols)]
+        for w, i in zip(r, cols):
+            if i < 0:
+                continue
+            text = w.get("text", "").strip()
+            if text:
+                row_cells[i].append(text)
+        cells[ri, lead:] = [" ".join(c) for c in row_cells]
+
+    df = pd.DataFrame(cells, columns=columns, copy=False)
     return df
 
 
 # -------- Page processing --------
 
-def render_page_image_from_pdf(pdf_path, page_index, dpi=200, poppler_path=None):
-    """Render a single PDF page to a PIL Image using pdf2image."""
-    if convert_from_path is None:
-        raise RuntimeError("pdf2image not installed")
-    # page numbers for convert_from_path are 1-based
-    imgs = convert_from_path(pdf_path, dpi=dpi, first_page=page_index + 1, last_page=page_index + 1, poppler_path=poppler_path)
-    if not imgs:
-        raise RuntimeError("Failed to render page")
-    return imgs[0]
+def contiguous_runs(indices):
+    """Group 0-based page indices into inclusive (first, last) runs, e.g. [0,1,2,5] -> [(0,2),(5,5)]."""
+    runs = []
+    for idx in sorted(indices):
+        if runs and idx == runs[-1][1] + 1:
+            runs[-1][1] = idx
+        else:
+            runs.append([idx, idx])
+    return [tuple(r) for r in runs]
 
 
-def process_pdf_file(path: Path, pages, out_dir: Path, options):
-    """Process a PDF file: for each page, attempt text extract with pdfplumber, otherwise OCR."""
-    basename = path.stem
-    images_out = out_dir / "images"
-    ensure_dir(images_out)
-    csvs = []
+def page_image_name(basename, page_index):
+    """File name of the saved render of a PDF page."""
+    return f"{basename}_page{page_index + 1}.png"
 
-    # open pdfplumber if available
-    plumb = None
-    if pdfplumber is not None:
+
+def render_pages_to_files(pdf_path, page_indices, images_out: Path, basename, dpi=200, poppler_path=None):
+    """Render PDF pages straight to `<basename>_page<N>.png` files (no PIL images kept in memory).
+
+    One pdf2image call per contiguous run of pages; returns {page_index: image path}.
+    A run that fails to render is reported and skipped, so its pages are simply missing.
+    """
+    convert_from_path = _convert_from_path()
+    if convert_from_path is None:
+        raise RuntimeError("pdf2image not installed")
+    rendered = {}
+    for first, last in contiguous_runs(page_indices):
+        # poppler writes into a scratch folder so only this run's files are picked up
+        with tempfile.TemporaryDirectory(dir=str(images_out)) as tmp:
+            try:
+                paths = convert_from_path(pdf_path, dpi=dpi, first_page=first + 1, last_page=last + 1,
+                                          poppler_path=poppler_path, thread_count=os.cpu_count() or 1,
+                                          output_folder=tmp, fmt="png", paths_only=True)
+            except Exception as e:
+                # keep the pages other runs rendered
+                print(f"Warning: could not render pages {first + 1}-{last + 1} to images: {e}")
+                continue
+            for src in paths:
+                # pdftoppm names files "<prefix>-<page number>.png"
+                pidx = int(Path(src).stem.rsplit("-", 1)[1]) - 1
+                dest = images_out / page_image_name(basename, pidx)
+                os.replace(src, dest)
+                rendered[pidx] = str(dest)
+    return rendered
+
+
+def ocr_words_from_images(image_paths, min_conf=30):
+    """OCR image files in one Tesseract run (via a list file); return one word list per image.
+
+    Tokens with confidence below `min_conf` (including Tesseract's -1 placeholders) are dropped.
+    """
+    pytesseract = _pytesseract()
+    if pytesseract is None:
+        raise RuntimeError("pytesseract not installed")
+    page_words = [[] for _ in image_paths]
+    if not image_paths:
+        return page_words
+    with tempfile.TemporaryDirectory() as tmp:
+        list_file = Path(tmp) / "images.txt"
+        list_file.write_text("\n".join(str(Path(p).resolve()) for p in image_paths) + "\n", encoding="utf-8")
+        data = pytesseract.image_to_data(str(list_file), output_type=pytesseract.Output.DICT)
+    # bind the TSV columns once and walk them together; page_num is 1-based, in list file order
+    texts = data["text"]
+    confs = data["conf"] if data.get("conf") else [None] * len(texts)
+    for txt, x, y, w, h, conf, page_num in zip(texts, data["left"], data["top"], data["width"], data["height"], confs, data["page_num"]):
+        txt = str(txt).strip()
+        if not txt:
+            continue
+        if conf is not None:
+            conf = float(conf)
+            if conf < min_conf:
+                continue
+        page_words[int(page_num) - 1].append({"text": txt, "x0": x, "x1": x + w, "top": y, "bottom": y + h, "conf": conf})
+    return page_words
+
+
+def extract_page_table(plumb, pidx, options, page_image=None):
+    """Extract a table from one page of an open pdfplumber PDF (built-in tables, else word heuristic); None if nothing found."""
+    try:
+        page = plumb.pages[pidx]
+        # First try built-in table extraction
+        tables = page.extract_tables()
+        if tables:
+            # Assume the first table is the main one
+            table = tables[0]
+            return table_from_rows(table, page_image=page_image)
+        # Fallback to heuristic
+        words = page.extract_words(extra_attrs=["size"])
+        if words:
+            return extract_table_from_words(words, y_tol=options.get("y_tol", 5), x_gap=options.get("x_gap", 50), page_image=page_image)
+    except Exception:
+        pass
+    return None
+
+
+def save_embedded_images(plumb, pidx, basename, images_out: Path, image_writer):
+    """Queue the embedded images of one page of an open pdfplumber PDF for writing; returns [(path, future)].
+
+    Only the page being processed has its image bytes in memory; each buffer is dropped once written.
+    """
+    writes = []
+    try:
+        page = plumb.pages[pidx]
+        for img_idx, img in enumerate(page.images):
+            img_path = images_out / f"{basename}_page{pidx + 1}_img{img_idx}.png"
+            writes.append((img_path, image_writer.submit(img_path.write_bytes, img['stream'].get_data())))
+    except Exception as e:
+        print(f"Warning: could not extract embedded images: {e}")
+    return writes
+
+
+def extract_page_tables(path: Path, pages, options, images_out: Path, plumb=None, page_images=None):
+    """Run pdfplumber extraction on `pages` of a PDF; returns {page_index: DataFrame or None}.
+
+    Embedded images are saved to `images_out` in the same pass (the page is parsed once), on a
+    small thread pool so the disk I/O overlaps with parsing the next pages.
+    Opens its own pdfplumber handle unless `plumb` is given, so it can run in a worker process;
+    if the PDF can't be opened, every page comes back as None and falls back to OCR.
+    `page_images` maps page index to the page image path recorded in the `page_image` column.
+    """
+    page_images = page_images or {}
+    results = {pidx: None for pidx in pages}
+    own_handle = plumb is None
+    if own_handle:
+        pdfplumber = _pdfplumber()
+        if pdfplumber is None:
+            return results
         try:
             plumb = pdfplumber.open(str(path))
         except Exception:
-            plumb = None
+            return results
+    image_writes = []
+    try:
+        with ThreadPoolExecutor(max_workers=4) as image_writer:
+            for pidx in pages:
+                print(f"Processing {path.name} page {pidx + 1}...")
+                results[pidx] = extract_page_table(plumb, pidx, options, page_image=page_images.get(pidx))
+                image_writes.extend(save_embedded_images(plumb, pidx, path.stem, images_out, image_writer))
+    finally:
+        if own_handle:
+            plumb.close()
+    for img_path, future in image_writes:
+        try:
+            future.result()
+            print(f"Saved embedded image: {img_path}")
+        except Exception as e:
+            print(f"Warning: could not extract embedded images: {e}")
+    return results
 
-    # get page count
-    n_pages = None
-    if plumb is not None:
-        n_pages = len(plumb.pages)
-    else:
-        # we can try rendering to find pages
-        if convert_from_path is not None:
-            try:
-                # this is a heavyweight check but works as fallback
-                imgs = convert_from_path(str(path), first_page=1, last_page=1, dpi=10, poppler_path=options.get("poppler_path"))
-                # if success, assume pages > 0; user provided explicit pages anyway
-                n_pages = 1000  # a large number; parse_pages_spec will bound
-            except Exception:
-                n_pages = 1
-        else:
-            n_pages = 1
 
-    for pidx in pages:
-        print(f"Processing {path.name} page {pidx + 1}...")
-        # render page image (always save page image)
+def pdf_workers(pages):
+    """Number of processes used for pdfplumber extraction of `pages` (1 means in-process)."""
+    return min(len(pages), os.cpu_count() or 1)
+
+
+def process_pdf_file(path: Path, pages, out_dir: Path, options, plumb=None):
+    """Process a PDF file: for each page, attempt text extract with pdfplumber, otherwise OCR.
+
+    An already-open pdfplumber PDF passed as `plumb` is only used when extraction runs in-process
+    (`pdf_workers(pages) <= 1`); pooled workers open their own. It is left open for the caller.
+    """
+    basename = path.stem
+    images_out = out_dir / "images"
+    ensure_dir(images_out)
+    page_dfs = []
+
+    # text extraction first; page rendering is deferred until we know which pages need OCR
+    # tables are built with their page_image column in place; pages are rendered to these paths below
+    expected_images = {pidx: str(images_out / page_image_name(basename, pidx)) for pidx in pages}
+    page_tables = {}
+    workers = pdf_workers(pages)
+    if workers > 1 and _pdfplumber() is not None:
+        # pdfplumber objects aren't picklable: each worker reopens the PDF for its share of pages
+        chunks = [pages[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for result in ex.map(partial(extract_page_tables, path, options=options, images_out=images_out, page_images=expected_images), chunks):
+                page_tables.update(result)
+    else:
+        page_tables = extract_page_tables(path, pages, options, images_out, plumb=plumb, page_images=expected_images)
+
+    # render page images (always save page image): full DPI only for pages that need OCR,
+    # a cheap preview for pages whose text was extracted directly
+    ocr_pages = [pidx for pidx in pages if page_tables[pidx] is None]
+    text_pages = [pidx for pidx in pages if page_tables[pidx] is not None]
+    page_images = {}
+    for render_pages, dpi in ((ocr_pages, options.get("dpi", 200)), (text_pages, options.get("preview_dpi", 72))):
+        if not render_pages:
+            continue
         try:
-            pil_img = render_page_image_from_pdf(str(path), pidx, dpi=options.get("dpi", 200), poppler_path=options.get("poppler_path"))
+            page_images.update(render_pages_to_files(str(path), render_pages, images_out, basename, dpi=dpi, poppler_path=options.get("poppler_path")))
         except Exception as e:
-            print("Warning: could not render page to image:", e)
-            pil_img = None
-
-        # save page image
-        image_name = f"{basename}_page{pidx + 1}.png"
-        image_path = images_out / image_name
-        if pil_img is not None:
-            pil_img.save(str(image_path))
-            page_image_path = str(image_path)
-        else:
-            page_image_path = None
+            print("Warning: could not render pages to images:", e)
 
-        # try pdfplumber text extraction
-        df = None
-        if plumb is not None:
-            try:
-                page = plumb.pages[pidx]
-                # First try built-in table extraction
-                tables = page.extract_tables()
-                if tables:
-                    # Assume the first table is the main one
-                    table = tables[0]
-                    df = pd.DataFrame(table)
-                else:
-                    # Fallback to heuristic
-                    words = page.extract_words(extra_attrs=["size"])
-                    if words:
-                        df = extract_table_from_words(words, y_tol=options.get("y_tol", 5), x_gap=options.get("x_gap", 50))
-            except Exception:
-                df = None
-
-        # fallback to OCR using pytesseract on rendered image
+    # pages that fall back to OCR are run through Tesseract in one batch
+    page_results = []
+    ocr_pending = []
+    for pidx in pages:
+        df = page_tables[pidx]
+        page_image_path = page_images.get(pidx)
         if df is None:
-            if pil_img is None:
-                print("No page image to OCR; skipping page.")
+            if page_image_path is None:
+                print(f"No page image to OCR; skipping page {pidx + 1}.")
                 continue
-            data = pytesseract.image_to_data(pil_img, output_type=Output.DICT)
-            words = []
-            for i, txt in enumerate(data["text"]):
-                txt = str(txt).strip()
-                if not txt:
-                    continue
-                x = data["left"][i]
-                y = data["top"][i]
-                w = data["width"][i]
-                h = data["height"][i]
-                conf = float(data.get("conf", [])[i]) if "conf" in data and data.get("conf") else None
-                words.append({"text": txt, "x0": x, "x1": x + w, "top": y, "bottom": y + h, "conf": conf})
-            df = extract_table_from_words(words, y_tol=options.get("y_tol", 8), x_gap=options.get("x_gap", 50))
-
-        # add page image path column to df (if not empty)
-        if df is not None and not df.empty and page_image_path is not None:
-            df.insert(0, "page_image", page_image_path)
-
-        # save CSV per page
-        out_csv = out_dir / f"{basename}_page{pidx + 1}.csv"
-        if df is not None and not df.empty:
-            df.to_csv(str(out_csv), index=False)
-            csvs.append(out_csv)
-            print(f"Saved CSV: {out_csv}")
-        else:
+            ocr_pending.append(len(page_results))
+        elif page_image_path is None and "page_image" in df.columns:
+            # rendering failed, so there is no image to point at
+            df = df.drop(columns="page_image")
+        page_results.append([pidx, df, page_image_path])
+
+    if ocr_pending:
+        print(f"Running OCR on {len(ocr_pending)} page(s)...")
+        page_words = ocr_words_from_images([page_results[i][2] for i in ocr_pending], min_conf=options.get("min_conf", 30))
+        for i, words in zip(ocr_pending, page_words):
+            page_results[i][1] = extract_table_from_words(words, y_tol=options.get("y_tol", 8), x_gap=options.get("x_gap", 50), page_image=page_results[i][2])
+
+    for pidx, df, page_image_path in page_results:
+        if df is None or df.empty:
             print(f"No table found on page {pidx + 1}")
-
-        # extract embedded images
-        if plumb is not None:
-            try:
-                page = plumb.pages[pidx]
-                for img_idx, img in enumerate(page.images):
-                    img_name = f"{basename}_page{pidx + 1}_img{img_idx}.png"
-                    img_path = images_out / img_name
-                    with open(str(img_path), 'wb') as f:
-                        f.write(img['stream'].get_data())
-                    print(f"Saved embedded image: {img_path}")
-            except Exception as e:
-                print(f"Warning: could not extract embedded images: {e}")
-
-    # close pdfplumber
-    if plumb is not None:
-        plumb.close()
+            continue
+        page_dfs.append(df)
+        # save CSV per page (unless only the combined CSV is wanted)
+        if not options.get("combined_only"):
+            out_csv = out_dir / f"{basename}_page{pidx + 1}.csv"
+            write_csv(df, out_csv)
+            print(f"Saved CSV: {out_csv}")
 
     # Optionally write combined CSV
-    if csvs:
-        combined = pd.concat([pd.read_csv(str(c)) for c in csvs], ignore_index=True, sort=False)
+    if page_dfs:
+        import pandas as pd
+
+        combined = pd.concat(page_dfs, ignore_index=True, sort=False)
         combined_path = out_dir / f"{basename}_combined.csv"
-        combined.to_csv(str(combined_path), index=False)
+        write_csv(combined, combined_path)
         print(f"Saved combined CSV: {combined_path}")
 
 
@@ -287,28 +469,16 @@ def process_image_file(path: Path, pages, out_dir: Path, options):
     images_out = out_dir / "images"
     ensure_dir(images_out)
     basename = path.stem
-    pil_img = Image.open(str(path))
+    pil_img = _pil_image().open(str(path))
     image_name = f"{basename}_image.png"
     image_path = images_out / image_name
     pil_img.save(str(image_path))
 
-    data = pytesseract.image_to_data(pil_img, output_type=Output.DICT)
-    words = []
-    for i, txt in enumerate(data["text"]):
-        txt = str(txt).strip()
-        if not txt:
-            continue
-        x = data["left"][i]
-        y = data["top"][i]
-        w = data["width"][i]
-        h = data["height"][i]
-        conf = float(data.get("conf", [])[i]) if "conf" in data and data.get("conf") else None
-        words.append({"text": txt, "x0": x, "x1": x + w, "top": y, "bottom": y + h, "conf": conf})
-    df = extract_table_from_words(words, y_tol=options.get("y_tol", 8), x_gap=options.get("x_gap", 50))
+    words = ocr_words_from_images([image_path], min_conf=options.get("min_conf", 30))[0]
+    df = extract_table_from_words(words, y_tol=options.get("y_tol", 8), x_gap=options.get("x_gap", 50), page_image=str(image_path))
     if df is not None and not df.empty:
-        df.insert(0, "page_image", str(image_path))
         out_csv = out_dir / f"{basename}.csv"
-        df.to_csv(str(out_csv), index=False)
+        write_csv(df, out_csv)
         print(f"Saved CSV: {out_csv}")
 
 
@@ -319,17 +489,44 @@ def list_input_files(input_dir: Path):
     return files
 
 
+def extract_file(input_path: Path, pages_spec, out_dir: Path, options=None):
+    """Extract tables from one PDF/image into `out_dir`; used by the CLI and the web UI."""
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    ensure_dir(out_dir)
+
+    if input_path.suffix.lower() != ".pdf":
+        process_image_file(input_path, [0], out_dir, options)
+        return
+
+    pdfplumber = _pdfplumber()
+    if pdfplumber is None:
+        process_pdf_file(input_path, parse_pages_spec(pages_spec, 1000), out_dir, options)
+        return
+
+    # get proper page count; when extraction runs in-process, reuse this parsed PDF for it
+    with pdfplumber.open(str(input_path)) as plumb:
+        pages = parse_pages_spec(pages_spec, len(plumb.pages))
+        if pdf_workers(pages) <= 1:
+            process_pdf_file(input_path, pages, out_dir, options, plumb=plumb)
+            return
+    # pooled extraction: workers open their own handles, so this one isn't held open meanwhile
+    process_pdf_file(input_path, pages, out_dir, options)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Extract tabular data from PDFs/images (heuristic OCR + layout clustering)")
     parser.add_argument("--input", help="Path to input PDF or image (optional: will prompt if not given)")
     parser.add_argument("--pages", default="1", help='Pages to process (1-based, e.g. "1,3,5-7" or "all"). Default=1')
     parser.add_argument("--output", default="output", help="Output folder (default: output)")
     parser.add_argument("--input-dir", default="input_files", help="Folder where you drop files (default: input_files)")
-    parser.add_argument("--dpi", type=int, default=200, help="Render DPI for page images")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_OPTIONS["dpi"], help="Render DPI for page images")
+    parser.add_argument("--preview-dpi", type=int, default=DEFAULT_OPTIONS["preview_dpi"], help="Render DPI for page images of pages not needing OCR")
     parser.add_argument("--poppler-path", default=None, help="Optional path to poppler bin (Windows)")
     parser.add_argument("--tesseract-path", default=None, help="Optional path to tesseract exe (Windows)")
-    parser.add_argument("--y-tol", type=float, default=6.0)
-    parser.add_argument("--x-gap", type=float, default=50.0)
+    parser.add_argument("--y-tol", type=float, default=DEFAULT_OPTIONS["y_tol"])
+    parser.add_argument("--x-gap", type=float, default=DEFAULT_OPTIONS["x_gap"])
+    parser.add_argument("--combined-only", action="store_true", help="For PDFs, write only the combined CSV (skip per-page CSVs)")
+    parser.add_argument("--min-conf", type=float, default=DEFAULT_OPTIONS["min_conf"], help="Drop OCR tokens below this confidence (0-100)")
     args = parser.parse_args()
 
     input_dir = Path(args.input_dir)
@@ -337,8 +534,8 @@ def main():
     out_dir = Path(args.output)
     ensure_dir(out_dir)
 
-    if args.tesseract_path:
-        pytesseract.pytesseract.tesseract_cmd = args.tesseract_path
+    if args.tesseract_path and _pytesseract() is not None:
+        _pytesseract().pytesseract.tesseract_cmd = args.tesseract_path
 
     # choose file
     input_path = None
@@ -366,32 +563,9 @@ def main():
             print("Invalid selection")
             sys.exit(1)
 
-    # determine page indices
-    pages_spec = args.pages
-    if input_path.suffix.lower() == ".pdf":
-        # if pdfplumber available, get proper page count
-        n_pages = None
-        if pdfplumber is not None:
-            with pdfplumber.open(str(input_path)) as p:
-                n_pages = len(p.pages)
-        else:
-            n_pages = 1000
-        pages = parse_pages_spec(pages_spec, n_pages)
-    else:
-        pages = [0]
-
-    options = {"dpi": args.dpi, "poppler_path": args.poppler_path, "y_tol": args.y_tol, "x_gap": args.x_gap}
-
-    # process
-    if input_path.suffix.lower() == ".pdf":
-        process_pdf_file(input_path, pages, out_dir, options)
-    else:
-        process_image_file(input_path, pages, out_dir, options)
-
-    print("Extraction complete. Starting web UI...")
-    import subprocess
-    import sys
-    subprocess.Popen([sys.executable, 'web_ui.py'])
+    options = {"dpi": args.dpi, "preview_dpi": args.preview_dpi, "poppler_path": args.poppler_path, "y_tol": args.y_tol, "x_gap": args.x_gap, "min_conf": args.min_conf, "combined_only": args.combined_only}
+    extract_file(input_path, args.pages, out_dir, options)
+    print("Extraction complete. Run `python web_ui.py` to review the results.")
 
 
 if __name__ == '__main__':
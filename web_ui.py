@@ -1,9 +1,13 @@
 from flask import Flask, render_template_string, send_from_directory, url_for, request, redirect
 import pandas as pd
 import os
+import functools
+import importlib.util
+import shutil
 from pathlib import Path
-import subprocess
-import sys
+
+# extraction runs in this process: its heavy libraries load on the first extraction and then stay loaded
+from extractor import extract_file
 
 app = Flask(__name__)
 
@@ -16,15 +20,30 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 IMAGES_DIR.mkdir(exist_ok=True)
 INPUT_DIR.mkdir(exist_ok=True)
 
+@functools.lru_cache(maxsize=1)
 def check_tesseract():
+    """Whether Tesseract can be run; checked once per process."""
     try:
         import pytesseract
+        # cheap PATH lookup first; only spawn tesseract if the binary exists
+        if shutil.which(pytesseract.pytesseract.tesseract_cmd) is None:
+            return False
         pytesseract.get_tesseract_version()
         return True
     except Exception:
         return False
 
-tesseract_available = check_tesseract()
+# pyarrow's multithreaded CSV parser is used for previews when it is installed
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+@functools.lru_cache(maxsize=32)
+def load_csv_html(filepath, mtime):
+    """Render a CSV as an HTML table. Cached per (path, mtime), so rewritten files are re-parsed."""
+    if PYARROW_AVAILABLE:
+        df = pd.read_csv(filepath, engine='pyarrow')
+    else:
+        df = pd.read_csv(filepath)
+    return df.to_html(index=False, escape=False)
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -33,10 +52,9 @@ def index():
         pages = request.form.get('pages', 'all')
         if selected_file:
             # Run extraction
-            cmd = [sys.executable, 'extractor.py', '--input', str(INPUT_DIR / selected_file), '--pages', pages]
             try:
-                subprocess.run(cmd, check=True)
-            except subprocess.CalledProcessError as e:
+                extract_file(INPUT_DIR / selected_file, pages, OUTPUT_DIR)
+            except Exception as e:
                 return f"Error running extraction: {e}. Make sure Tesseract OCR is installed and in PATH for image processing.", 500
             return redirect(url_for('index'))
     
@@ -199,16 +217,15 @@ def index():
         </div>
     </body>
     </html>
-    """, input_files=input_files, csv_files=csv_files, combined_files=combined_files, image_files=image_files, tesseract_available=tesseract_available)
+    """, input_files=input_files, csv_files=csv_files, combined_files=combined_files, image_files=image_files, tesseract_available=check_tesseract())
 
 @app.route('/csv/<filename>')
 def view_csv(filename):
     filepath = OUTPUT_DIR / filename
     if not filepath.exists():
         return "File not found", 404
-    df = pd.read_csv(filepath)
     # Convert to HTML table
-    table_html = df.to_html(index=False, escape=False)
+    table_html = load_csv_html(str(filepath), filepath.stat().st_mtime_ns)
     return render_template_string("""
     <!DOCTYPE html>
     <html lang="en">